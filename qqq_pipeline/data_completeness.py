@@ -1,49 +1,43 @@
 import numpy as np
 import pandas as pd
-import gc
+
+# Column layout of the array used for the completeness checks
+COMPLETENESS_COLUMNS = ["callVolume", "putVolume", "callOpenInterest", "putOpenInterest",
+                        "callDelta", "putDelta", "gamma", "vega", "callTheta", "callRho",
+                        "callValue", "putValue", "callBidPrice", "callAskPrice", "putBidPrice", "putAskPrice",
+                        "spotPrice", "dte"]
 
 def check_data_completeness(QQQ: pd.DataFrame) -> pd.DataFrame:
-    liq_bad = (QQQ["callVolume"].isna() | QQQ["putVolume"].isna() |
-            QQQ["callOpenInterest"].isna() | QQQ["putOpenInterest"].isna())
+    arr = QQQ[COMPLETENESS_COLUMNS].to_numpy(dtype=np.float64, copy=False)
+    n = len(arr)
+    nan_mask = np.isnan(arr)
 
-    print("Percent observations with NA open interest or volume %:", 100 * liq_bad.mean())
+    liq_bad = nan_mask[:, 0:4].any(axis=1)
 
-    greeks_bad = (~np.isfinite(QQQ["callDelta"])|
-                  ~np.isfinite(QQQ["putDelta"])|
-                 ~np.isfinite(QQQ["gamma"]) |
-                 ~np.isfinite(QQQ["vega"])  |
-                 ~np.isfinite(QQQ["callTheta"]) |
-                 ~np.isfinite(QQQ["callRho"]))
+    print("Percent observations with NA open interest or volume %:", 100 * np.count_nonzero(liq_bad) / n)
 
-    print("Percent observations with NA or inf greeks %:", 100 * greeks_bad.mean())
+    greeks_bad = ~np.isfinite(arr[:, 4:10]).all(axis=1)
 
-    price_bad = (QQQ["callValue"].isna() | (QQQ["callValue"] < 0) |
-                QQQ["putValue"].isna()  | (QQQ["putValue"] < 0)  |
-                QQQ["callBidPrice"].isna() | (QQQ["callBidPrice"] < 0) |
-                QQQ["callAskPrice"].isna() | (QQQ["callAskPrice"] < 0) |
-                QQQ["putBidPrice"].isna()  | (QQQ["putBidPrice"] < 0)  |
-                QQQ["putAskPrice"].isna()  | (QQQ["putAskPrice"] < 0)  )
+    print("Percent observations with NA or inf greeks %:", 100 * np.count_nonzero(greeks_bad) / n)
 
-    print("Percent observations with NA or negative option prices or values %:", 100 * price_bad.mean())
+    price_bad = (arr[:, 10:16] < 0).any(axis=1) | nan_mask[:, 10:16].any(axis=1)
 
-    underlying_bad = ((QQQ["spotPrice"].isna()) | (QQQ["spotPrice"] <= 0))
-    print("Percent observations with NA or negative underlying prices %:", 100 * underlying_bad.mean())
+    print("Percent observations with NA or negative option prices or values %:", 100 * np.count_nonzero(price_bad) / n)
 
-    print("Percent observations with weird delta not falling in expected bounds %:", 100 * (~(QQQ['callDelta'].between(0, 1)) | (~QQQ['putDelta'].between(-1, 0))).mean())
-    
-    print("Percent observations with negative DTE %:", 100 * (QQQ['dte'] < 0).mean())
-    
-    print("Percent observations with vid > ask %:",
-    100 * ((QQQ["callBidPrice"] > QQQ["callAskPrice"]) |
-             (QQQ["putBidPrice"] > QQQ["putAskPrice"])).mean())
+    underlying_bad = nan_mask[:, 16] | (arr[:, 16] <= 0)
+    print("Percent observations with NA or negative underlying prices %:", 100 * np.count_nonzero(underlying_bad) / n)
 
-    print("Removing bad observations (bid > ask) from dataframe.")
+    call_delta, put_delta = arr[:, 4], arr[:, 5]
+    delta_bad = ~((call_delta >= 0) & (call_delta <= 1)) | ~((put_delta >= -1) & (put_delta <= 0))
+    print("Percent observations with weird delta not falling in expected bounds %:", 100 * np.count_nonzero(delta_bad) / n)
 
-    QQQ = QQQ[~((QQQ["callBidPrice"] > QQQ["callAskPrice"]) |
-          (QQQ["putBidPrice"] > QQQ["putAskPrice"]))]
+    print("Percent observations with negative DTE %:", 100 * np.count_nonzero(arr[:, 17] < 0) / n)
 
+    bid_ask_bad = (arr[:, 12] > arr[:, 13]) | (arr[:, 14] > arr[:, 15])
+    print("Percent observations with vid > ask %:", 100 * np.count_nonzero(bid_ask_bad) / n)
+
+    print("Removing bad observations (bid > ask) from dataframe.")
 
-    del liq_bad, greeks_bad, price_bad, underlying_bad
-    gc.collect()
+    QQQ = QQQ.take(np.flatnonzero(~bid_ask_bad))
 
-    return QQQ
\ No newline at end of file
+    return QQQ
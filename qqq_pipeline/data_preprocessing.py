@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-import gc
 
 divYield = 0.0047
 
@@ -10,11 +9,8 @@ def preprocessor(QQQ: pd.DataFrame) -> pd.DataFrame:
     call_delta_idx = list(QQQ.columns).index('callDelta')
     QQQ.insert(call_delta_idx + 1, 'putDelta', QQQ['callDelta'] - np.exp(-divYield * QQQ['dte']/365))
 
-    QQQ["tradeDate"] = pd.to_datetime(QQQ["tradeDate"])
-    QQQ["expirDate"] = pd.to_datetime(QQQ["expirDate"])
+    QQQ["tradeDate"] = pd.to_datetime(QQQ["tradeDate"], format="ISO8601", cache=True)
+    QQQ["expirDate"] = pd.to_datetime(QQQ["expirDate"], format="ISO8601", cache=True)
     QQQ.drop(columns=["stockPrice"], inplace=True)
 
-    del call_delta_idx
-    gc.collect()
-
     return QQQ
\ No newline at end of file
@@ -7,21 +7,9 @@ from data_preprocessing import preprocessor
 from features import build_time_features, build_volume_oi_features, build_vol_features
 
 import sys
-import importlib
 from pathlib import Path
 import pandas as pd
 
-import data_preprocessing as dp
-import data_completeness as dc
-import features as tf
-import vol_helpers as vh
-
-# Reload modules to ensure latest code is used
-tf = importlib.reload(tf)
-dp = importlib.reload(dp)
-dc = importlib.reload(dc)
-vh = importlib.reload(vh)
-
 
 # ============================================================================
 # Configuration
@@ -54,7 +42,12 @@ def main():
     if not QQQ_PATH.exists():
         raise FileNotFoundError(f"Data file not found: {QQQ_PATH}")
     
-    QQQ = pd.read_csv(QQQ_PATH)
+    # pyarrow parses the chain with a multi-threaded columnar reader; fall back
+    # to the default C parser when it is not installed
+    try:
+        QQQ = pd.read_csv(QQQ_PATH, engine="pyarrow")
+    except ImportError:
+        QQQ = pd.read_csv(QQQ_PATH)
     print(f"    ✓ Loaded {len(QQQ)} rows from {QQQ_PATH.name}")
     print(f"    Columns: {list(QQQ.columns)}")
     print(f"    Shape: {QQQ.shape}")
@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-import gc
 
 # Import vol_helpers - works both as package import and direct script execution
 try:
@@ -9,91 +8,137 @@ except ImportError:
     from vol_helpers import find_atm_straddle_iv
 
 # Default option expiry dates 
-DEFAULT_EXPIRY_DATES = [
-    pd.Timestamp('2020-01-17'),
-    pd.Timestamp('2020-02-21'),
-    pd.Timestamp('2020-03-20'),
-    pd.Timestamp('2020-04-09'),
-    pd.Timestamp('2020-04-17'),
-    pd.Timestamp('2020-05-15'),
-    pd.Timestamp('2020-06-19'),
-    pd.Timestamp('2020-07-02'),
-    pd.Timestamp('2020-07-17'),
-    pd.Timestamp('2020-08-21'),
-    pd.Timestamp('2020-09-18'),
-    pd.Timestamp('2020-10-16'),
-    pd.Timestamp('2020-11-20'),
-    pd.Timestamp('2020-12-18'),
-    pd.Timestamp('2020-12-24'),
-    pd.Timestamp('2020-12-31'),
-    pd.Timestamp('2021-01-15'),
-    pd.Timestamp('2021-02-19'),
-    pd.Timestamp('2021-03-19'),
-    pd.Timestamp('2021-04-01'),
-    pd.Timestamp('2021-04-16'),
-    pd.Timestamp('2021-05-21'),
-    pd.Timestamp('2021-06-18'),
-    pd.Timestamp('2021-07-16'),
-    pd.Timestamp('2021-08-20'),
-    pd.Timestamp('2021-09-17'),
-    pd.Timestamp('2021-10-15'),
-    pd.Timestamp('2021-11-19'),
-    pd.Timestamp('2021-12-17'),
-    pd.Timestamp('2021-12-23'),
-    pd.Timestamp('2022-01-21'),
-    pd.Timestamp('2022-02-18'),
-    pd.Timestamp('2022-03-18'),
-    pd.Timestamp('2022-04-14'),
-    pd.Timestamp('2022-05-20'),
-    pd.Timestamp('2022-06-17'),
-    pd.Timestamp('2022-07-15'),
-    pd.Timestamp('2022-08-19'),
-    pd.Timestamp('2022-09-16'),
-    pd.Timestamp('2022-10-21'),
-    pd.Timestamp('2022-11-18'),
-    pd.Timestamp('2022-12-16'),
-    pd.Timestamp('2023-01-20'),
-    pd.Timestamp('2023-02-17'),
-    pd.Timestamp('2023-03-17'),
-    pd.Timestamp('2023-04-06'),
-    pd.Timestamp('2023-04-21'),
-    pd.Timestamp('2023-05-19'),
-    pd.Timestamp('2023-06-16'),
-    pd.Timestamp('2023-07-21'),
-    pd.Timestamp('2023-08-18'),
-    pd.Timestamp('2023-09-15'),
-    pd.Timestamp('2023-10-20'),
-    pd.Timestamp('2023-11-17'),
-    pd.Timestamp('2023-12-15'),
-    pd.Timestamp('2024-01-19'),
-    pd.Timestamp('2024-02-16'),
-    pd.Timestamp('2024-03-15'),
-    pd.Timestamp('2024-03-28'),
-    pd.Timestamp('2024-04-19'),
-    pd.Timestamp('2024-05-17'),
-    pd.Timestamp('2024-06-21'),
-    pd.Timestamp('2024-07-19'),
-    pd.Timestamp('2024-08-16'),
-    pd.Timestamp('2024-09-20'),
-    pd.Timestamp('2024-10-18'),
-    pd.Timestamp('2024-11-15'),
-    pd.Timestamp('2024-12-20'),
-    pd.Timestamp('2025-01-17'),
-    pd.Timestamp('2025-02-21'),
-    pd.Timestamp('2025-03-21'),
-    pd.Timestamp('2025-04-17'),
-    pd.Timestamp('2025-05-16'),
-    pd.Timestamp('2025-06-20'),
-    pd.Timestamp('2025-07-03'),
-    pd.Timestamp('2025-07-18'),
-    pd.Timestamp('2025-08-15'),
-    pd.Timestamp('2025-09-19'),
-    pd.Timestamp('2025-10-17'),
-    pd.Timestamp('2025-11-21'),
-    pd.Timestamp('2025-12-19')
-]
-
-DEFAULT_EXPIRY_DATES_SET = set(DEFAULT_EXPIRY_DATES)
+DEFAULT_EXPIRY_DATES = np.array([
+    '2020-01-17',
+    '2020-02-21',
+    '2020-03-20',
+    '2020-04-09',
+    '2020-04-17',
+    '2020-05-15',
+    '2020-06-19',
+    '2020-07-02',
+    '2020-07-17',
+    '2020-08-21',
+    '2020-09-18',
+    '2020-10-16',
+    '2020-11-20',
+    '2020-12-18',
+    '2020-12-24',
+    '2020-12-31',
+    '2021-01-15',
+    '2021-02-19',
+    '2021-03-19',
+    '2021-04-01',
+    '2021-04-16',
+    '2021-05-21',
+    '2021-06-18',
+    '2021-07-16',
+    '2021-08-20',
+    '2021-09-17',
+    '2021-10-15',
+    '2021-11-19',
+    '2021-12-17',
+    '2021-12-23',
+    '2022-01-21',
+    '2022-02-18',
+    '2022-03-18',
+    '2022-04-14',
+    '2022-05-20',
+    '2022-06-17',
+    '2022-07-15',
+    '2022-08-19',
+    '2022-09-16',
+    '2022-10-21',
+    '2022-11-18',
+    '2022-12-16',
+    '2023-01-20',
+    '2023-02-17',
+    '2023-03-17',
+    '2023-04-06',
+    '2023-04-21',
+    '2023-05-19',
+    '2023-06-16',
+    '2023-07-21',
+    '2023-08-18',
+    '2023-09-15',
+    '2023-10-20',
+    '2023-11-17',
+    '2023-12-15',
+    '2024-01-19',
+    '2024-02-16',
+    '2024-03-15',
+    '2024-03-28',
+    '2024-04-19',
+    '2024-05-17',
+    '2024-06-21',
+    '2024-07-19',
+    '2024-08-16',
+    '2024-09-20',
+    '2024-10-18',
+    '2024-11-15',
+    '2024-12-20',
+    '2025-01-17',
+    '2025-02-21',
+    '2025-03-21',
+    '2025-04-17',
+    '2025-05-16',
+    '2025-06-20',
+    '2025-07-03',
+    '2025-07-18',
+    '2025-08-15',
+    '2025-09-19',
+    '2025-10-17',
+    '2025-11-21',
+    '2025-12-19'
+], dtype="datetime64[D]")
+
+# Default expiries as int64 day numbers since the epoch, built once at import
+DEFAULT_EXPIRY_DAYS = DEFAULT_EXPIRY_DATES.astype(np.int64)
+
+# Widest day range day_bitmap will pack (~100 years, a few KB of bits)
+MAX_BITMAP_DAYS = 100 * 366
+
+
+def day_bitmap(days: np.ndarray) -> tuple[int, np.ndarray] | None:
+    """Pack int64 day numbers into a uint64 bitmap, one bit per calendar day from the earliest day.
+
+    Returns None when the days span more than MAX_BITMAP_DAYS.
+    """
+    if len(days) == 0:
+        return 0, np.zeros(0, dtype=np.uint64)
+    first = int(days.min())
+    if int(days.max()) - first > MAX_BITMAP_DAYS:
+        return None
+    offsets = (days - first).astype(np.uint64)
+    bits = np.zeros(int(offsets.max()) // 64 + 1, dtype=np.uint64)
+    np.bitwise_or.at(bits, offsets >> np.uint64(6), np.uint64(1) << (offsets & np.uint64(63)))
+    return first, bits
+
+
+def in_day_bitmap(days: np.ndarray, first: int, bits: np.ndarray) -> np.ndarray:
+    """Test int64 day numbers against a bitmap from `day_bitmap`; days outside its range are False."""
+    offsets = days - first
+    inside = (offsets >= 0) & (offsets < 64 * len(bits))
+    if not inside.any():
+        return inside
+    offsets = np.where(inside, offsets, 0).astype(np.uint64)
+    hit = (bits[offsets >> np.uint64(6)] >> (offsets & np.uint64(63))) & np.uint64(1)
+    return inside & hit.astype(bool)
+
+
+# Bitmap of the default expiry days, built once at import
+DEFAULT_EXPIRY_BITMAP = day_bitmap(DEFAULT_EXPIRY_DAYS)
+
+# Calendar flag columns, in the column order of time_features.calendar_columns
+CALENDAR_COLUMNS = ["is_monday", "is_friday", "is_option_expiry", "month",
+                    "is_month_end_trading", "is_quarter_end_trading", "is_year_end_trading"]
+
+
+def last_in_period(periods: np.ndarray) -> np.ndarray:
+    """Flag the last element of each run of equal values in a sorted period array."""
+    is_last = np.ones(len(periods), dtype=bool)
+    is_last[:-1] = periods[1:] != periods[:-1]
+    return is_last
 
 
 class time_features:
@@ -108,12 +153,22 @@ class time_features:
     """
 
     def __init__(self,
-                expiry_dates: list | None = None,
+                expiry_dates: list | set | None = None,
                 vol_windows: tuple = (5, 21, 63),
                 annualisation: float = 252.0 ) -> None:
         
-        self.expiry_dates = (expiry_dates if expiry_dates is not None else DEFAULT_EXPIRY_DATES)
-        self.expiry_dates_set = set(self.expiry_dates)
+        if expiry_dates is None:
+            self.expiry_dates = DEFAULT_EXPIRY_DATES
+            self.expiry_days = DEFAULT_EXPIRY_DAYS
+            self.expiry_bitmap = DEFAULT_EXPIRY_BITMAP
+        else:
+            self.expiry_dates = expiry_dates
+            # accept any iterable (e.g. a set); missing dates can never match a trade date,
+            # so drop them before taking day numbers
+            expiry = pd.to_datetime(list(expiry_dates)).dropna()
+            self.expiry_days = np.sort(np.asarray(expiry.values.astype("datetime64[D]"), dtype=np.int64))
+            # one bit per calendar day across the expiry range; None when the range is too wide
+            self.expiry_bitmap = day_bitmap(self.expiry_days)
         self.vol_windows = tuple(vol_windows)
         self.annualisation = float(annualisation)
 
@@ -122,59 +177,108 @@ class time_features:
 
         Expects `QQQ` to have columns `tradeDate` and `spotPrice`.
         """
-        df = QQQ.copy()
-        df["tradeDate"] = pd.to_datetime(df["tradeDate"])  # be robust
+        tradeDate = QQQ["tradeDate"]
+        if not pd.api.types.is_datetime64_any_dtype(tradeDate):
+            tradeDate = pd.to_datetime(tradeDate, format="ISO8601", cache=True)  # be robust
+        daily = pd.DataFrame({"tradeDate": tradeDate, "spot": QQQ["spotPrice"]}).dropna(subset=["tradeDate"])
+
+        # stable sort by date with priced rows first, so keeping the first row of
+        # each date picks the first non-null spot like groupby(...).first()
+        order = np.lexsort((daily["spot"].isna().to_numpy(), daily["tradeDate"].to_numpy()))
         daily = (
-            df.sort_values("tradeDate")
-            .groupby("tradeDate", as_index=False)
-            .agg(spot=("spotPrice", "first"))
+            daily.take(order)
+            .drop_duplicates(subset="tradeDate", keep="first")
+            .reset_index(drop=True)
         )
-        
-        del df
-        gc.collect()
 
         return daily
 
+    def next_day_return_columns(self, spot: np.ndarray) -> dict:
+        """Return `ret_1d` and `nextDayRet` arrays for a sorted daily spot array."""
+        ret = np.empty_like(spot)
+        ret[:1] = np.nan
+        np.divide(spot[1:], spot[:-1], out=ret[1:])
+        ret[1:] -= 1.0
+        next_ret = np.empty_like(ret)
+        next_ret[:-1] = ret[1:]
+        next_ret[-1:] = np.nan
+        return {"ret_1d": ret, "nextDayRet": next_ret}
+
+    def realised_vol_columns(self, ret: np.ndarray) -> dict:
+        """Return annualised rolling std arrays `vol_{w}d` of daily returns for each vol window."""
+        valid = np.isfinite(ret)
+
+        # prefix sums shared by every window; returns are demeaned first so the
+        # sum-of-squares difference does not lose precision
+        x = np.where(valid, ret - (ret[valid].mean() if valid.any() else 0.0), 0.0)
+        cs = np.concatenate(([0.0], np.cumsum(x)))
+        cs2 = np.concatenate(([0.0], np.cumsum(x * x)))
+        nobs = np.concatenate(([0], np.cumsum(valid)))
+
+        # annualisation factor computed once and applied in place to every window
+        scale = np.sqrt(self.annualisation)
+
+        vols = {}
+        for w in self.vol_windows:
+            vol = np.full(len(ret), np.nan)
+            # a sample std needs at least two returns, so windows below 2 stay all-NaN
+            if 2 <= w <= len(ret):
+                s1 = cs[w:] - cs[:-w]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    var = (cs2[w:] - cs2[:-w] - s1 * s1 / w) / (w - 1)
+                np.maximum(var, 0.0, out=var)
+                np.sqrt(var, out=var)
+                var *= scale
+                full = (nobs[w:] - nobs[:-w]) == w
+                vol[w - 1:][full] = var[full]
+            vols[f"vol_{w}d"] = vol
+        return vols
+
+    def calendar_columns(self, tradeDate: np.ndarray) -> dict:
+        """Return int8 calendar flag arrays for a sorted datetime64 trade date array.
+
+        All flags are written into one column-major (N, 7) int8 matrix and returned
+        as contiguous column views keyed by CALENDAR_COLUMNS.
+        """
+        flags = np.empty((len(tradeDate), len(CALENDAR_COLUMNS)), dtype=np.int8, order="F")
+        MON, FRI, EXPIRY, MONTH, MONTH_END, QUARTER_END, YEAR_END = range(len(CALENDAR_COLUMNS))
+
+        # weekday and month straight from the integer day/month codes
+        # (day 0, 1970-01-01, was a Thursday)
+        days = tradeDate.astype("datetime64[D]").astype(np.int64)
+        months = tradeDate.astype("datetime64[M]").astype(np.int64)
+        weekday = (days + 3) % 7
+        flags[:, MON] = weekday == 0
+        flags[:, FRI] = weekday == 4
+
+        # expiry membership is a single shift-and-mask per day into the expiry bitmap,
+        # or a sorted lookup when the expiries span too many days for a bitmap
+        if self.expiry_bitmap is None:
+            flags[:, EXPIRY] = np.isin(days, self.expiry_days)
+        else:
+            flags[:, EXPIRY] = in_day_bitmap(days, *self.expiry_bitmap)
+
+        flags[:, MONTH] = months % 12 + 1
+
+        # daily is sorted by tradeDate, so the last trading day of a period is the
+        # row whose successor falls in a different calendar month/quarter/year
+        flags[:, MONTH_END] = last_in_period(months)
+        flags[:, QUARTER_END] = last_in_period(months // 3)
+        flags[:, YEAR_END] = last_in_period(months // 12)
+
+        return dict(zip(CALENDAR_COLUMNS, flags.T))
+
     def add_nextDayReturn(self, daily: pd.DataFrame) -> pd.DataFrame:
-        daily = daily.copy()
-        daily["ret_1d"] = daily["spot"].pct_change()
-        daily["nextDayRet"] = daily["ret_1d"].shift(-1)
-        return daily
+        return daily.assign(**self.next_day_return_columns(daily["spot"].to_numpy(dtype=np.float64)))
 
     def add_realisedVolFeatures(self, daily: pd.DataFrame) -> pd.DataFrame:
-        daily = daily.copy()
-        for w in self.vol_windows:
-            col = f"vol_{w}d"
-            daily[col] = daily["ret_1d"].rolling(w).std() * np.sqrt(self.annualisation)
-        return daily
+        return daily.assign(**self.realised_vol_columns(daily["ret_1d"].to_numpy(dtype=np.float64)))
 
     def add_calendarEffectFeatures(self, daily: pd.DataFrame) -> pd.DataFrame:
-        daily = daily.copy()
-        if not pd.api.types.is_datetime64_any_dtype(daily["tradeDate"]):
-            daily["tradeDate"] = pd.to_datetime(daily["tradeDate"])
-
-        daily["is_monday"] = (daily["tradeDate"].dt.weekday == 0).astype(int)
-        daily["is_friday"] = (daily["tradeDate"].dt.weekday == 4).astype(int)
-        daily["is_option_expiry"] = daily["tradeDate"].isin(self.expiry_dates_set).astype(int)
-        daily["month"] = daily["tradeDate"].dt.month
-
-        # month-end (last trading day in each calendar month)
-        last_trading_day_in_month = daily.groupby(daily["tradeDate"].dt.to_period("M"))["tradeDate"].transform("max")
-        daily["is_month_end_trading"] = (daily["tradeDate"] == last_trading_day_in_month).astype(int)
-        del last_trading_day_in_month
-
-        # quarter-end (last trading day in each calendar quarter)
-        last_trading_day_in_quarter = daily.groupby(daily["tradeDate"].dt.to_period("Q"))["tradeDate"].transform("max")
-        daily["is_quarter_end_trading"] = (daily["tradeDate"] == last_trading_day_in_quarter).astype(int)
-        del last_trading_day_in_quarter
-
-        # year-end (last trading day in calendar year)
-        last_trading_day_in_year = daily.groupby(daily["tradeDate"].dt.to_period("Y"))["tradeDate"].transform("max")
-        daily["is_year_end_trading"] = (daily["tradeDate"] == last_trading_day_in_year).astype(int)
-        del last_trading_day_in_year
-
-        gc.collect()
-        return daily
+        tradeDate = daily["tradeDate"]
+        if not pd.api.types.is_datetime64_any_dtype(tradeDate):
+            tradeDate = pd.to_datetime(tradeDate, format="ISO8601", cache=True)
+        return daily.assign(tradeDate=tradeDate, **self.calendar_columns(tradeDate.to_numpy()))
 
     def build_features(
         self,
@@ -183,22 +287,26 @@ class time_features:
         compute_calendar: bool = True) -> pd.DataFrame:
         """High level method to go from raw `QQQ` to a daily dataframe with features.
 
+        Features are accumulated as a dict of NumPy arrays and the daily
+        dataframe is assembled once at the end.
+
         Parameters:
             QQQ: raw dataframe with `tradeDate` and `spotPrice` columns
             compute_realised: whether to add realised volatility features
             compute_calendar: whether to add calendar effect features
         """
         daily = self.prepare_daily_dataframe(QQQ)
-        daily = self.add_nextDayReturn(daily)
+        columns = {"tradeDate": daily["tradeDate"].to_numpy(), "spot": daily["spot"].to_numpy(dtype=np.float64)}
+        columns.update(self.next_day_return_columns(columns["spot"]))
         if compute_realised:
-            daily = self.add_realisedVolFeatures(daily)
+            columns.update(self.realised_vol_columns(columns["ret_1d"]))
         if compute_calendar:
-            daily = self.add_calendarEffectFeatures(daily)
-        return daily
+            columns.update(self.calendar_columns(columns["tradeDate"]))
+        return pd.DataFrame(columns, copy=False)
 
 def build_time_features(
     QQQ: pd.DataFrame,
-    expiry_dates: list | None = None,
+    expiry_dates: list | set | None = None,
     vol_windows: tuple = (5, 21, 63),
     annualisation: float = 252.0,
     compute_realised: bool = True,
@@ -207,6 +315,9 @@ def build_time_features(
     tf = time_features(expiry_dates=expiry_dates, vol_windows=vol_windows, annualisation=annualisation)
     return tf.build_features(QQQ, compute_realised=compute_realised, compute_calendar=compute_calendar)
 
+# Delta bucket labels, indexed by the codes from volume_OI_features.delta_bucket_codes
+DELTA_BUCKET_LABELS = ["atm", "itm", "otm"]
+
 class volume_OI_features():
 
     def __init__(self,
@@ -220,94 +331,76 @@ class volume_OI_features():
     
     def calc_volume_oi(self, QQQ: pd.DataFrame) -> pd.DataFrame: 
         
-        QQQ = QQQ.copy()
-        QQQ["mid_call"] = (QQQ["callBidPrice"] + QQQ["callAskPrice"]) / 2
-        QQQ["mid_put"] = (QQQ["putBidPrice"] + QQQ["putAskPrice"]) / 2
+        mid_call = (QQQ["callBidPrice"] + QQQ["callAskPrice"]) / 2
+        mid_put = (QQQ["putBidPrice"] + QQQ["putAskPrice"]) / 2
 
-        QQQ["call_notvol"] = QQQ["callVolume"] * QQQ["mid_call"]
-        QQQ["put_notvol"] = QQQ["putVolume"] * QQQ["mid_put"]
-        QQQ["call_notoi"] = QQQ["callOpenInterest"] * QQQ["mid_call"]
-        QQQ["put_notoi"] = QQQ["putOpenInterest"] * QQQ["mid_put"]
+        return QQQ.assign(
+            mid_call=mid_call,
+            mid_put=mid_put,
+            call_notvol=QQQ["callVolume"] * mid_call,
+            put_notvol=QQQ["putVolume"] * mid_put,
+            call_notoi=QQQ["callOpenInterest"] * mid_call,
+            put_notoi=QQQ["putOpenInterest"] * mid_put)
 
-        return QQQ
+    def delta_bucket_codes(self, delta: np.ndarray) -> np.ndarray:
+        """Map absolute deltas to int8 codes into DELTA_BUCKET_LABELS.
 
-    def create_delta_dte_buckets(self, QQQ: pd.DataFrame, daily: pd.DataFrame) -> pd.DataFrame:
-        
-        QQQ = QQQ.copy()
-        QQQ["dte_bucket"] = pd.cut(QQQ["dte"],
-                                   bins= self.dte_buckets,
-                                   labels=self.dte_buckets_labels)
-        
-        callDelta = QQQ["callDelta"]
-        putDelta = QQQ["putDelta"].abs()
-        QQQ["call_delta_bucket"] = "itm"
-        QQQ["put_delta_bucket"] = "itm"
-        QQQ.loc[callDelta.between(0.4, 0.6, inclusive="both"), "call_delta_bucket"] = "atm"
-        QQQ.loc[putDelta.between(0.4, 0.6, inclusive="both"), "put_delta_bucket"] = "atm"
-        QQQ.loc[callDelta < 0.4, "call_delta_bucket"] = "otm"
-        QQQ.loc[putDelta < 0.4, "put_delta_bucket"] = "otm"
-
-        call_agg = (
-            QQQ.groupby(["tradeDate", "dte_bucket", "call_delta_bucket"], observed=True).agg(
-            call_notvol=("call_notvol", "sum"),
-            call_notoi=("call_notoi", "sum")).reset_index())
-
-        put_agg = (QQQ.groupby(["tradeDate", "dte_bucket", "put_delta_bucket"], observed=True).agg(
-            call_notvol=("call_notvol", "sum"),
-            put_notvol=("put_notvol", "sum"),
-            call_notoi=("call_notoi", "sum"),
-            put_notoi=("put_notoi", "sum")).reset_index())
-
-        daily_call_agg = call_agg.pivot_table(
-            index="tradeDate",
-            columns=["dte_bucket", "call_delta_bucket"],
-            values=["call_notvol", "call_notoi"],
-            aggfunc="sum",
-            fill_value=0)
-
-        daily_put_agg = put_agg.pivot_table(
-            index="tradeDate",
-            columns=["dte_bucket", "put_delta_bucket"],
-            values=["put_notvol", "put_notoi"],
-            aggfunc="sum",
-            fill_value=0)
-        
-        daily_call_agg.columns = [
-            f"{metric}_{dte}_{delta}"
-            for metric, dte, delta in daily_call_agg.columns]
-        
-        daily_call_agg = daily_call_agg.reset_index()
+        [0.4, 0.6] is atm, below 0.4 is otm and everything else (including NaN) is itm.
+        """
+        codes = np.ones(len(delta), dtype=np.int8)
+        codes[(delta >= 0.4) & (delta <= 0.6)] = 0
+        codes[delta < 0.4] = 2
+        return codes
 
-        daily_put_agg.columns = [
-            f"{metric}_{dte}_{delta}"
-            for metric, dte, delta in daily_put_agg.columns]
-        
-        daily_put_agg = daily_put_agg.reset_index()
-
-        for dte in self.dte_buckets_labels:
-            for delta in ["itm", "atm", "otm"]:
-
-                # Volume ratios
-                put_col = f"put_notvol_{dte}_{delta}"
-                call_col = f"call_notvol_{dte}_{delta}"
-                daily_call_agg[f"pc_ratio_notional_vol_{dte}_{delta}"] = (
-                        daily_put_agg[put_col] / (daily_call_agg[call_col] + self.machine_error)
-                    )
-
-                # OI ratios
-                put_col = f"put_notoi_{dte}_{delta}"
-                call_col = f"call_notoi_{dte}_{delta}"
-                daily_call_agg[f"pc_ratio_notional_oi_{dte}_{delta}"] = (
-                        daily_put_agg[put_col] / (daily_call_agg[call_col] + self.machine_error)
-                    )
-
-        intermediate = pd.merge(daily_put_agg, daily_call_agg, on='tradeDate', how='inner')
-        daily = pd.merge(daily, intermediate, on='tradeDate', how='inner')
-
-        del intermediate, daily_put_agg, daily_call_agg, put_agg, call_agg, callDelta, putDelta
-        gc.collect()
+    def create_delta_dte_buckets(self, QQQ: pd.DataFrame, daily: pd.DataFrame) -> pd.DataFrame:
         
-        return daily
+        call_delta_codes = self.delta_bucket_codes(QQQ["callDelta"].to_numpy(dtype=np.float64))
+        put_delta_codes = self.delta_bucket_codes(np.abs(QQQ["putDelta"].to_numpy(dtype=np.float64)))
+
+        # integer codes for (tradeDate, dte bucket, delta bucket); dte buckets are
+        # right-closed like pd.cut and rows outside every bucket are dropped
+        deltas = DELTA_BUCKET_LABELS
+        n_dte, n_delta = len(self.dte_buckets_labels), len(deltas)
+        day_codes, days = pd.factorize(QQQ["tradeDate"], sort=True)
+        dte_codes = np.searchsorted(self.dte_buckets, QQQ["dte"].to_numpy(dtype=np.float64), side="left") - 1
+        keep = (day_codes >= 0) & (dte_codes >= 0) & (dte_codes < n_dte)
+        cell_codes = (day_codes * n_dte + dte_codes)[keep] * n_delta
+        n_cells = len(days) * n_dte * n_delta
+        days_present = np.bincount(day_codes[keep], minlength=len(days)) > 0
+
+        def bucket_sums(delta_codes: np.ndarray, metric: str) -> np.ndarray:
+            """Sum `metric` into a (n_days, n_dte * n_delta) block in one pass."""
+            values = QQQ[metric].to_numpy(dtype=np.float64)[keep]
+            sums = np.bincount(cell_codes + delta_codes[keep], weights=np.where(np.isnan(values), 0.0, values),
+                               minlength=n_cells)
+            return sums.reshape(len(days), n_dte * n_delta)[days_present]
+
+        def bucket_columns(metrics: list) -> list:
+            return [f"{metric}_{dte}_{delta}"
+                    for metric in metrics for dte in self.dte_buckets_labels for delta in deltas]
+
+        call_notoi = bucket_sums(call_delta_codes, "call_notoi")
+        call_notvol = bucket_sums(call_delta_codes, "call_notvol")
+        put_notoi = bucket_sums(put_delta_codes, "put_notoi")
+        put_notvol = bucket_sums(put_delta_codes, "put_notvol")
+
+        # put/call ratios for every (dte, delta) bucket at once, laid out as
+        # vol/oi pairs per bucket with deltas in itm, atm, otm order
+        ratio_deltas = ["itm", "atm", "otm"]
+        order = [i * n_delta + deltas.index(delta) for i in range(n_dte) for delta in ratio_deltas]
+        ratios = np.stack([put_notvol / (call_notvol + self.machine_error),
+                           put_notoi / (call_notoi + self.machine_error)], axis=2)[:, order].reshape(len(put_notoi), -1)
+        ratio_columns = [f"pc_ratio_notional_{metric}_{dte}_{delta}"
+                         for dte in self.dte_buckets_labels for delta in ratio_deltas for metric in ["vol", "oi"]]
+
+        # put and call blocks share the same days, so build one frame keyed by
+        # tradeDate and join it onto daily once
+        bucket_agg = pd.DataFrame(
+            np.hstack([put_notoi, put_notvol, call_notoi, call_notvol, ratios]),
+            index=pd.Index(days[days_present], name="tradeDate"),
+            columns=bucket_columns(["put_notoi", "put_notvol", "call_notoi", "call_notvol"]) + ratio_columns)
+
+        return daily.join(bucket_agg, on="tradeDate", how="inner").reset_index(drop=True)
     
     def build_features(self,
                        QQQ: pd.DataFrame,
@@ -340,8 +433,6 @@ class vol_features():
         Calls find_atm_straddle_iv for each target DTE, which internally iterates over
         all dates in daily to populate call_iv, put_iv columns (and _lower/_upper variants
         if exact DTE not available)."""
-        
-        daily = daily.copy()
 
         # Iterate over target DTEs
         for target_dte in self.target_dtes:
@@ -1,40 +1,102 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.stats import spearmanr
+from scipy.stats import rankdata, t as student_t
 import logging
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def calculate_z_scores(daily, feature_columns):
-    feature_zscore_columns = []
-    for col in feature_columns:
-        z_col = f"{col}_z"
-        daily[z_col] = (daily[col] - daily[col].mean()) / daily[col].std()
-        daily[f"{z_col}_chg1"] = daily[z_col].diff()
-        feature_zscore_columns.extend([z_col, f"{z_col}_chg1"])
+    X = daily[feature_columns].to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Z = (X - np.nanmean(X, axis=0)) / np.nanstd(X, axis=0, ddof=1)
+    dZ = np.empty_like(Z)
+    dZ[:1] = np.nan
+    dZ[1:] = Z[1:] - Z[:-1]
+
+    # interleave each z-score with its one-day change
+    feature_zscore_columns = [name for col in feature_columns for name in (f"{col}_z", f"{col}_z_chg1")]
+    zscores = pd.DataFrame(np.stack([Z, dZ], axis=2).reshape(len(X), -1),
+                           index=daily.index, columns=feature_zscore_columns)
+    daily = pd.concat([daily.drop(columns=feature_zscore_columns, errors="ignore"), zscores], axis=1)
     return daily, feature_zscore_columns
 
+def ranks_by_na_pattern(X, y, missing):
+    """Yield (columns, rows, feature ranks, target ranks) for each group of features sharing NA rows.
+
+    Features with the same `missing` pattern see the same subset of `y`, so it is ranked once per group.
+    """
+    patterns, group = np.unique(missing.T, axis=0, return_inverse=True)
+    for g, pattern in enumerate(patterns):
+        cols = np.flatnonzero(group.ravel() == g)
+        rows = ~pattern
+        yield cols, rows, rankdata(X[rows][:, cols], axis=0), rankdata(y[rows])
+
+def rolling_corr(x, y, window):
+    """Rolling Pearson correlation over `window` points from prefix sums, NaN until the window is full."""
+    out = np.full(len(x), np.nan)
+    if len(x) < window:
+        return out
+    x = x - x.mean()
+    y = y - y.mean()
+
+    def window_sums(a):
+        cs = np.concatenate(([0.0], np.cumsum(a)))
+        return cs[window:] - cs[:-window]
+
+    sx, sy = window_sums(x), window_sums(y)
+    cov = window_sums(x * y) - sx * sy / window
+    var_x = window_sums(x * x) - sx * sx / window
+    var_y = window_sums(y * y) - sy * sy / window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[window - 1:] = cov / np.sqrt(var_x * var_y)
+    return out
+
 def calculate_ics(daily, feature_zscore_columns):
-    ic_rows = []
+    X = daily[feature_zscore_columns].to_numpy(dtype=np.float64)
+    y = daily["nextDayRet"].to_numpy(dtype=np.float64)
     n = len(daily)
-    for col in feature_zscore_columns:
-        previous_length = len(daily)
-        df_ = daily[[col, "nextDayRet"]].dropna()
-        if previous_length - len(df_) > 0:
-            logging.info(f"Dropped {previous_length - len(df_)} rows due to NA values for feature {col}")
-        ic, pval = spearmanr(df_[col], df_["nextDayRet"])
-        tstat = ic * np.sqrt((n - 2) / (1 - ic**2)) if np.isfinite(ic) and abs(ic) < 1 else np.nan
-        ic_rows.append({"feature": col, "IC_spearman": ic, "IC_tstat": tstat, "IC_pvalue": pval})
-    return pd.DataFrame(ic_rows).sort_values("IC_spearman", ascending=False)
+    missing = np.isnan(X) | np.isnan(y)[:, None]
+    for col, dropped in zip(feature_zscore_columns, missing.sum(axis=0)):
+        if dropped > 0:
+            logging.info(f"Dropped {dropped} rows due to NA values for feature {col}")
+
+    # correlate each group's ranks with a single matrix product
+    ic = np.full(len(feature_zscore_columns), np.nan)
+    n_obs = np.zeros(len(feature_zscore_columns), dtype=np.int64)
+    for cols, rows, R, ry in ranks_by_na_pattern(X, y, missing):
+        n_obs[cols] = len(ry)
+        if len(ry) < 2:
+            continue
+        R -= R.mean(axis=0)
+        ry -= ry.mean()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ic[cols] = (R.T @ ry) / (np.linalg.norm(R, axis=0) * np.linalg.norm(ry))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ic = np.clip(ic, -1.0, 1.0)
+        tstat = np.where(np.isfinite(ic) & (np.abs(ic) < 1), ic * np.sqrt((n - 2) / (1 - ic**2)), np.nan)
+        dof = n_obs - 2
+        t_obs = ic * np.sqrt(dof / ((1.0 + ic) * (1.0 - ic)))
+        pval = np.where(dof > 0, 2 * student_t.sf(np.abs(t_obs), np.maximum(dof, 1)), np.nan)
+    ic_summary = pd.DataFrame({"feature": feature_zscore_columns, "IC_spearman": ic, "IC_tstat": tstat, "IC_pvalue": pval})
+    return ic_summary.sort_values("IC_spearman", ascending=False)
+
+def decile_means(x, y):
+    """Mean of `y` within each decile of `x`, bucketed like pd.qcut(x, 10, duplicates="drop")."""
+    edges = np.unique(np.quantile(x, np.linspace(0, 1, 11)))
+    decile = np.clip(np.searchsorted(edges, x, side="left") - 1, 0, max(len(edges) - 2, 0))
+    counts = np.bincount(decile, minlength=10)
+    observed = np.flatnonzero(counts)
+    return observed, np.bincount(decile, weights=y, minlength=10)[observed] / counts[observed]
 
 def plot_decile_curves(daily, top_features):
     fig, axes = plt.subplots(len(top_features), 1, figsize=(10, 3 * len(top_features)), sharex=True)
     axes = axes if len(top_features) > 1 else [axes]
     for ax, feat in zip(axes, top_features):
         df = daily[[feat, "nextDayRet"]].dropna()
-        decile_mean = df.assign(decile=pd.qcut(df[feat], 10, labels=False, duplicates="drop")).groupby("decile")["nextDayRet"].mean()
-        ax.plot(decile_mean.index, decile_mean.values, marker="o")
+        deciles, means = decile_means(df[feat].to_numpy(dtype=np.float64), df["nextDayRet"].to_numpy(dtype=np.float64))
+        ax.plot(deciles, means, marker="o")
         ax.axhline(0, linestyle="--", linewidth=0.8)
         ax.set(title=f"Decile Curve: {feat}", ylabel="Avg nextDayRet")
     axes[-1].set_xlabel("Decile (0 = lowest, 9 = highest)")
@@ -44,18 +106,29 @@ def plot_decile_curves(daily, top_features):
 def plot_rolling_ics(daily, top_features):
     fig, axes = plt.subplots(len(top_features), 1, figsize=(12, 3 * len(top_features)), sharex=True)
     axes = axes if len(top_features) > 1 else [axes]
-    for ax, feat in zip(axes, top_features):
-        df = daily[["tradeDate", feat, "nextDayRet"]].dropna()
-        rolling_ic = df[feat].rank().rolling(252).corr(df["nextDayRet"].rank())
-        ax.plot(pd.to_datetime(df["tradeDate"]), rolling_ic)
+
+    # rank every feature and nextDayRet once up front, then roll over the ranks
+    X = daily[top_features].to_numpy(dtype=np.float64)
+    y = daily["nextDayRet"].to_numpy(dtype=np.float64)
+    dates = pd.to_datetime(daily["tradeDate"]).to_numpy()
+    missing = np.isnan(X) | np.isnan(y)[:, None] | np.isnat(dates)[:, None]
+    rolling_ics = {}
+    for cols, rows, R, ry in ranks_by_na_pattern(X, y, missing):
+        for j, col in enumerate(cols):
+            rolling_ics[col] = (dates[rows], rolling_corr(R[:, j], ry, 252))
+
+    for i, (ax, feat) in enumerate(zip(axes, top_features)):
+        ax.plot(*rolling_ics[i])
         ax.axhline(0, color="gray", linestyle="--", linewidth=0.8)
         ax.set(title=f"Rolling 252-Day Spearman IC: {feat}", ylabel="IC")
     axes[-1].set_xlabel("Date")
     plt.tight_layout()
     plt.show()
 
-def calculate_ic_and_plot(daily, feature_columns: list | None = None):
-    daily = daily.copy()
+def calculate_ic_and_plot(daily, feature_columns: list | None = None, top_k: int | None = None):
+    if top_k is not None and (not isinstance(top_k, (int, np.integer)) or isinstance(top_k, bool) or top_k < 1):
+        raise ValueError(f"top_k must be a positive integer, got {top_k!r}")
+
     non_feature_cols = ['tradeDate', 'spot', 'expirDate', 'ret_1d', 'nextDayRet', 'dte', 'strike', 'delta', 'gamma', 'vega', 'theta', 'rho',
                          'vol_5d', 'vol_21d', 'vol_63d', 'callValue', 'callBidPrice', 'callAskPrice', 'callOpenInterest', 'callVolume', 'putValue',
                          'putBidPrice', 'putAskPrice', 'putOpenInterest', 'putVolume', 'is_monday', 'is_friday',
@@ -67,7 +140,7 @@ def calculate_ic_and_plot(daily, feature_columns: list | None = None):
     
     # Dropping the 1 NA due to nextDayRet
     pre_length = len(daily)
-    daily.dropna(inplace=True)
+    daily = daily.dropna()
     logging.info(f"Dropped {pre_length - len(daily)} rows due to NA values")
 
     daily, feature_zscore_columns = calculate_z_scores(daily, feature_columns)
@@ -75,5 +148,7 @@ def calculate_ic_and_plot(daily, feature_columns: list | None = None):
 
     print(ic_summary)
 
-    plot_decile_curves(daily, feature_zscore_columns)
-    plot_rolling_ics(daily, feature_zscore_columns)
\ No newline at end of file
+    # plot every feature unless asked for only the strongest top_k (ic_summary is sorted by IC)
+    plot_features = feature_zscore_columns if top_k is None else ic_summary["feature"].head(top_k).tolist()
+    plot_decile_curves(daily, plot_features)
+    plot_rolling_ics(daily, plot_features)
\ No newline at end of file
@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-import gc
 import logging
 from scipy.stats import norm
 from scipy.optimize import brentq
@@ -292,8 +291,6 @@ def find_atm_straddle_iv(
 					pass
 	
 	daily = daily.drop(columns=[f'call_iv_{d}d_lower', f'put_iv_{d}d_lower', f'call_iv_{d}d_upper', f'put_iv_{d}d_upper'], errors='ignore')
-	
-	gc.collect()
 
 	return daily
     